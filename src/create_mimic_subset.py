@@ -10,11 +10,69 @@ This script creates a random sample of 3,000 hospital admissions and extracts al
 import pandas as pd
 import numpy as np
 import os
+import gzip
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-import random
 from tqdm import tqdm
 import sys
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+# Optional faster gzip backends
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+try:
+    from isal import igzip
+except ImportError:
+    igzip = None
+
+# ID columns fit in 32 bits; Arrow integers are nullable, so tables with missing IDs still load
+DTYPES = {
+    'ROW_ID': 'int32[pyarrow]',
+    'SUBJECT_ID': 'int32[pyarrow]',
+    'HADM_ID': 'int32[pyarrow]',
+    'ICUSTAY_ID': 'int32[pyarrow]',
+    'ITEMID': 'int32[pyarrow]',
+}
+
+# Arrow types for columns read by the chunked readers. Text columns are pinned to
+# string so that a block of empty or numeric-looking values cannot change the schema;
+# event times are timestamps to match the time columns of the other tables.
+ARROW_COLUMN_TYPES = {
+    'ROW_ID': pa.int32(),
+    'SUBJECT_ID': pa.int32(),
+    'HADM_ID': pa.int32(),
+    'ICUSTAY_ID': pa.int32(),
+    'ITEMID': pa.int32(),
+    'CHARTTIME': pa.timestamp('s'),
+    'VALUE': pa.string(),
+    'VALUENUM': pa.float64(),
+    'VALUEUOM': pa.string(),
+    'FLAG': pa.string(),
+}
+
+# Parquet output settings; dictionary encoding shrinks repetitive code and drug name columns
+PARQUET_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': True,
+}
+PARQUET_ROW_GROUP_SIZE = 200_000
+
+# CHARTEVENTS columns kept in the vital signs subset
+CHARTEVENTS_COLUMNS = [
+    'SUBJECT_ID', 'HADM_ID', 'ICUSTAY_ID', 'ITEMID',
+    'CHARTTIME', 'VALUENUM', 'VALUEUOM',
+]
 
 def clean_path(path):
     """Clean a path string by removing quotes and extra whitespace."""
@@ -97,89 +155,263 @@ def get_sample_size():
         except ValueError:
             print("\nError: Please enter a valid number.")
 
-def read_csv_gz_from_zip(zip_path, root_dir, file_name, **kwargs):
-    """Read a gzipped CSV file from a zip archive into a pandas DataFrame."""
+def get_decompressor(decompressor=None):
+    """Resolve the gzip backend to use.
+    
+    By default isal is used if installed, otherwise gzip. rapidgzip is opt-in only:
+    it extracts the member to a temporary file first, which needs as much free space
+    in the temp directory as the compressed member (about 4GB for CHARTEVENTS).
+    """
+    available = {
+        'rapidgzip': rapidgzip is not None,
+        'isal': igzip is not None,
+        'gzip': True,
+    }
+    if decompressor is None:
+        return 'isal' if available['isal'] else 'gzip'
+    if decompressor not in available:
+        raise ValueError(f"Unknown decompressor: {decompressor}")
+    if not available[decompressor]:
+        raise ValueError(f"Decompressor {decompressor} is not installed")
+    return decompressor
+
+@contextmanager
+def open_gz_from_zip(zip_ref, root_dir, file_name, decompressor=None, parallelization=None):
+    """Open a gzipped file from an open zip archive as a decompressed binary stream.
+    
+    parallelization is the number of threads rapidgzip may use (default: all cores).
+    """
+    decompressor = get_decompressor(decompressor)
+    member = f"{root_dir}/{file_name}"
+    if decompressor == 'rapidgzip':
+        # rapidgzip needs a seekable file to decompress in parallel
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gz_path = zip_ref.extract(member, tmp_dir)
+            threads = parallelization or os.cpu_count()
+            with rapidgzip.RapidgzipFile(gz_path, parallelization=threads) as stream:
+                yield stream
+    elif decompressor == 'isal':
+        with zip_ref.open(member) as gz_file, igzip.open(gz_file, 'rb') as stream:
+            yield stream
+    else:
+        with zip_ref.open(member) as gz_file, gzip.open(gz_file, 'rb') as stream:
+            yield stream
+
+def read_csv_gz_from_zip(zip_ref, root_dir, file_name, decompressor=None, **kwargs):
+    """Read a gzipped CSV file from an open zip archive into an Arrow-backed pandas DataFrame."""
     print(f"Reading {file_name} from zip file...")
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        with zip_ref.open(f"{root_dir}/{file_name}") as gz_file:
-            return pd.read_csv(gz_file, compression='gzip', **kwargs)
+    if 'dtype' not in kwargs:
+        # The pyarrow engine in pandas 2.0 rejects dtype keys for missing columns
+        with open_gz_from_zip(zip_ref, root_dir, file_name, decompressor) as stream:
+            columns = pd.read_csv(stream, nrows=0).columns
+        kwargs['dtype'] = {column: dtype for column, dtype in DTYPES.items() if column in columns}
+    kwargs.setdefault('engine', 'pyarrow')
+    kwargs.setdefault('dtype_backend', 'pyarrow')
+    with open_gz_from_zip(zip_ref, root_dir, file_name, decompressor) as stream:
+        return pd.read_csv(stream, **kwargs)
+
+def copy_gz_from_zip(zip_ref, root_dir, file_name, subset_dir):
+    """Copy a gzipped file out of an open zip archive without decompressing it."""
+    output_path = os.path.join(subset_dir, file_name)
+    print(f"Copying {file_name} to {output_path}...")
+    with zip_ref.open(f"{root_dir}/{file_name}") as src, open(output_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, length=1 << 20)
+    return output_path
+
+def csv_gz_shape(zip_ref, root_dir, file_name, decompressor=None):
+    """Return the (rows, columns) shape of a gzipped CSV file in an open zip archive."""
+    with open_gz_from_zip(zip_ref, root_dir, file_name, decompressor) as stream:
+        # Read everything as text; only the shape is needed
+        return pd.read_csv(stream, dtype=str).shape
+
+def filter_by_ids(df, column, id_set):
+    """Return the rows of df whose column value is in the Arrow array id_set.
+    
+    The probe runs through pyarrow.compute.is_in against an int32 id_set built
+    once by the caller.
+    """
+    mask = pc.is_in(pa.Array.from_pandas(df[column]), value_set=id_set)
+    return df.loc[np.asarray(mask)].reset_index(drop=True)
 
-def save_df_to_csv(df, subset_dir, file_name):
-    """Save DataFrame to CSV in the subset directory."""
+def save_df_to_parquet(df, subset_dir, file_name):
+    """Save DataFrame to a zstd-compressed Parquet file in the subset directory."""
     output_path = os.path.join(subset_dir, file_name)
     print(f"Saving {output_path}...")
-    df.to_csv(output_path, index=False)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, output_path, row_group_size=PARQUET_ROW_GROUP_SIZE, **PARQUET_OPTIONS)
     return output_path
 
-def process_chartevents_chunks(zip_path, root_dir, icustay_ids, itemids, chunksize=100000):
-    """Process CHARTEVENTS in chunks to extract vital signs for selected ICU stays."""
-    chunks = []
+def save_dfs_to_parquet(tables, subset_dir, max_workers=8):
+    """Save several (DataFrame, file name) pairs to Parquet concurrently."""
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tables))) as executor:
+        futures = [
+            executor.submit(save_df_to_parquet, df, subset_dir, file_name)
+            for df, file_name in tables
+        ]
+        return [future.result() for future in as_completed(futures)]
+
+@contextmanager
+def open_parquet_writer(output_path, schema, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Open a Parquet file for streaming record batches into.
+    
+    Yields a write function. Batches are buffered until they fill a row group, so
+    many small filtered batches do not each become a tiny row group.
+    """
+    pending = []
+    pending_rows = 0
+    
+    with pq.ParquetWriter(output_path, schema, **PARQUET_OPTIONS) as writer:
+        def write_batch(batch):
+            nonlocal pending_rows
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+                pending.clear()
+                pending_rows = 0
+        
+        yield write_batch
+        
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+
+def build_lookup_table(ids):
+    """Return a boolean table indexed by ID that is True for each of the given IDs."""
+    ids = np.asarray(ids, dtype=np.int64)
+    lookup_table = np.zeros(int(ids.max()) + 1 if len(ids) else 0, dtype=np.bool_)
+    lookup_table[ids] = True
+    return lookup_table
+
+def lookup_mask(lookup_table, column):
+    """Return a row mask for an Arrow integer column from a build_lookup_table table.
+    
+    Nulls and IDs outside the table are treated as not selected.
+    """
+    values = pc.fill_null(column, -1).to_numpy()
+    in_range = (values >= 0) & (values < len(lookup_table))
+    mask = np.zeros(len(values), dtype=np.bool_)
+    mask[in_range] = lookup_table[values[in_range]]
+    return mask
+
+def run_with_zip(func, zip_path, *args, **kwargs):
+    """Open the zip archive at zip_path and call func with it as the first argument.
+    
+    Open ZipFile handles cannot be sent to worker processes, so each worker opens its own.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return func(zip_ref, *args, **kwargs)
+
+def take_up_to_quota(batch, column, sorted_ids, counts, max_per_id):
+    """Keep at most max_per_id rows per ID in batch, counting rows already taken.
+    
+    counts is an int32 array of rows taken so far, aligned with sorted_ids, and is
+    updated in place. Every ID in batch must be in sorted_ids. Returns the selected rows.
+    """
+    batch_ids = batch.column(column).to_numpy()
+    idx = np.searchsorted(sorted_ids, batch_ids)
+    rank = pd.Series(idx).groupby(idx).cumcount().to_numpy()
+    keep = rank < max_per_id - counts[idx]
+    np.add.at(counts, idx[keep], 1)
+    return batch.filter(pa.array(keep))
+
+def process_chartevents_chunks(zip_ref, root_dir, icustay_ids, itemids, output_path, block_size=16 << 20, max_per_icustay=None, decompressor=None, parallelization=None, position=None):
+    """Process CHARTEVENTS in chunks to extract vital signs for selected ICU stays.
+    
+    Filtered rows are written straight to output_path; returns the (rows, columns) shape.
+    If max_per_icustay is set, only that many vital sign rows are kept per ICU stay
+    and reading stops once every stay has reached it. position sets the progress
+    bar row when several processors run at once.
+    """
     total_rows = 0
     chunk_count = 0
     
-    print("Processing CHARTEVENTS in chunks...")
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        with zip_ref.open(f"{root_dir}/CHARTEVENTS.csv.gz") as gz_file:
-            for chunk in tqdm(pd.read_csv(gz_file, compression='gzip', chunksize=chunksize)):
+    # ITEMIDs and ICU stay IDs are small bounded integers, so a boolean lookup
+    # table indexed by ID replaces a hash probe per row
+    itemid_table = build_lookup_table(itemids)
+    icustay_table = build_lookup_table(icustay_ids)
+    sorted_icustay_ids = np.unique(np.asarray(icustay_ids, dtype=np.int32))
+    icustay_counts = np.zeros(len(sorted_icustay_ids), dtype=np.int32)
+    
+    # Only parse the columns we keep
+    read_options = pv.ReadOptions(block_size=block_size)
+    convert_options = pv.ConvertOptions(
+        include_columns=CHARTEVENTS_COLUMNS,
+        column_types=ARROW_COLUMN_TYPES,
+        strings_can_be_null=True,
+    )
+    
+    with open_gz_from_zip(zip_ref, root_dir, "CHARTEVENTS.csv.gz", decompressor, parallelization) as stream:
+        reader = pv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+        with open_parquet_writer(output_path, reader.schema) as write_batch:
+            for batch in tqdm(reader, desc="Processing CHARTEVENTS", position=position):
                 chunk_count += 1
                 
-                # Filter for selected ICU stays and vital sign ITEMIDs
-                filtered_chunk = chunk[
-                    (chunk['ICUSTAY_ID'].isin(icustay_ids)) & 
-                    (chunk['ITEMID'].isin(itemids))
-                ]
+                # Filter for vital sign ITEMIDs first, then test only the surviving
+                # rows against the selected ICU stays instead of ANDing two full masks
+                filtered_batch = batch.filter(lookup_mask(itemid_table, batch.column('ITEMID')))
+                filtered_batch = filtered_batch.filter(
+                    lookup_mask(icustay_table, filtered_batch.column('ICUSTAY_ID'))
+                )
+                
+                if max_per_icustay is not None and filtered_batch.num_rows:
+                    filtered_batch = take_up_to_quota(
+                        filtered_batch, 'ICUSTAY_ID', sorted_icustay_ids, icustay_counts, max_per_icustay
+                    )
                 
-                if not filtered_chunk.empty:
-                    chunks.append(filtered_chunk)
-                    total_rows += len(filtered_chunk)
+                if filtered_batch.num_rows:
+                    write_batch(filtered_batch)
+                    total_rows += filtered_batch.num_rows
+                
+                # Check if we've reached the limit for all ICU stays
+                if max_per_icustay is not None and (icustay_counts >= max_per_icustay).all():
+                    break
     
-    if chunks:
-        return pd.concat(chunks, ignore_index=True)
-    else:
-        return pd.DataFrame()
+    return total_rows, len(reader.schema)
 
-def process_labevents_chunks(zip_path, root_dir, subject_ids, chunksize=100000, max_per_subject=10):
-    """Process LABEVENTS in chunks to extract a sample for selected patients."""
-    chunks = []
+def process_labevents_chunks(zip_ref, root_dir, subject_ids, output_path, block_size=16 << 20, max_per_subject=10, decompressor=None, parallelization=None, position=None):
+    """Process LABEVENTS in chunks to extract a sample for selected patients.
+    
+    Selected rows are written straight to output_path; returns the (rows, columns) shape.
+    position sets the progress bar row when several processors run at once.
+    """
     total_rows = 0
-    subject_counts = {subject_id: 0 for subject_id in subject_ids}
+    subject_set = pa.array(np.unique(np.asarray(subject_ids, dtype=np.int32)))
+    sorted_subject_ids = subject_set.to_numpy()
+    subject_counts = np.zeros(len(sorted_subject_ids), dtype=np.int32)
     
-    print("Processing LABEVENTS in chunks...")
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        with zip_ref.open(f"{root_dir}/LABEVENTS.csv.gz") as gz_file:
-            for chunk in tqdm(pd.read_csv(gz_file, compression='gzip', chunksize=chunksize)):
+    read_options = pv.ReadOptions(block_size=block_size)
+    convert_options = pv.ConvertOptions(column_types=ARROW_COLUMN_TYPES, strings_can_be_null=True)
+    
+    with open_gz_from_zip(zip_ref, root_dir, "LABEVENTS.csv.gz", decompressor, parallelization) as stream:
+        reader = pv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+        with open_parquet_writer(output_path, reader.schema) as write_batch:
+            for batch in tqdm(reader, desc="Processing LABEVENTS", position=position):
                 # Filter for selected patients
-                filtered_chunk = chunk[chunk['SUBJECT_ID'].isin(subject_ids)]
+                filtered_batch = batch.filter(pc.is_in(batch.column('SUBJECT_ID'), value_set=subject_set))
                 
-                if not filtered_chunk.empty:
+                if filtered_batch.num_rows:
                     # For each patient, take only up to max_per_subject lab events
-                    selected_rows = []
-                    for _, row in filtered_chunk.iterrows():
-                        subject_id = row['SUBJECT_ID']
-                        if subject_counts[subject_id] < max_per_subject:
-                            selected_rows.append(row)
-                            subject_counts[subject_id] += 1
+                    selected_batch = take_up_to_quota(
+                        filtered_batch, 'SUBJECT_ID', sorted_subject_ids, subject_counts, max_per_subject
+                    )
                     
-                    if selected_rows:
-                        chunks.append(pd.DataFrame(selected_rows))
-                        total_rows += len(selected_rows)
+                    if selected_batch.num_rows:
+                        write_batch(selected_batch)
+                        total_rows += selected_batch.num_rows
                 
                 # Check if we've reached the limit for all patients
-                if all(count >= max_per_subject for count in subject_counts.values()):
+                if (subject_counts >= max_per_subject).all():
                     break
     
-    if chunks:
-        return pd.concat(chunks, ignore_index=True)
-    else:
-        return pd.DataFrame()
+    return total_rows, len(reader.schema)
 
-def create_subset(mimic_zip, subset_dir, root_dir, sample_size=3000):
-    """Create a subset of the MIMIC-III database."""
+def create_subset(mimic_zip, subset_dir, root_dir, sample_size=3000, decompressor=None):
+    """Create a subset of the MIMIC-III database.
+    
+    decompressor selects the gzip backend for CHARTEVENTS and LABEVENTS; pass
+    'rapidgzip' to opt in to parallel decompression (see get_decompressor).
+    """
     try:
-        # Set random seed for reproducibility
-        np.random.seed(42)
-        random.seed(42)
-        
         # Create plots directory
         plots_dir = os.path.join(subset_dir, "_plots")
         if not os.path.exists(plots_dir):
@@ -191,41 +423,51 @@ def create_subset(mimic_zip, subset_dir, root_dir, sample_size=3000):
         print(f"Sample size: {sample_size} admissions")
         print("="*80 + "\n")
         
-        # Load key tables
-        admissions = read_csv_gz_from_zip(mimic_zip, root_dir, "ADMISSIONS.csv.gz")
-        patients = read_csv_gz_from_zip(mimic_zip, root_dir, "PATIENTS.csv.gz")
-        icustays = read_csv_gz_from_zip(mimic_zip, root_dir, "ICUSTAYS.csv.gz")
-        
-        # Create random subset
-        print(f"\nSelecting {sample_size} random hospital admissions...")
-        all_hadm_ids = admissions['HADM_ID'].unique()
-        sampled_hadm_ids = np.random.choice(all_hadm_ids, size=sample_size, replace=False)
-        
-        # Filter main tables
-        admissions_subset = admissions[admissions['HADM_ID'].isin(sampled_hadm_ids)].copy()
-        sampled_subject_ids = admissions_subset['SUBJECT_ID'].unique()
-        patients_subset = patients[patients['SUBJECT_ID'].isin(sampled_subject_ids)].copy()
-        icustays_subset = icustays[icustays['HADM_ID'].isin(sampled_hadm_ids)].copy()
-        
-        # Get ICU stay IDs
-        sampled_icustay_ids = icustays_subset['ICUSTAY_ID'].unique()
-        
-        # Load and filter other tables
-        print("\nExtracting related data...")
-        diagnoses = read_csv_gz_from_zip(mimic_zip, root_dir, "DIAGNOSES_ICD.csv.gz")
-        diagnoses_subset = diagnoses[diagnoses['HADM_ID'].isin(sampled_hadm_ids)].copy()
-        
-        procedures = read_csv_gz_from_zip(mimic_zip, root_dir, "PROCEDURES_ICD.csv.gz")
-        procedures_subset = procedures[procedures['HADM_ID'].isin(sampled_hadm_ids)].copy()
-        
-        prescriptions = read_csv_gz_from_zip(mimic_zip, root_dir, "PRESCRIPTIONS.csv.gz")
-        prescriptions_subset = prescriptions[prescriptions['HADM_ID'].isin(sampled_hadm_ids)].copy()
-        
-        # Load dictionary tables
-        d_icd_diagnoses = read_csv_gz_from_zip(mimic_zip, root_dir, "D_ICD_DIAGNOSES.csv.gz")
-        d_icd_procedures = read_csv_gz_from_zip(mimic_zip, root_dir, "D_ICD_PROCEDURES.csv.gz")
-        d_items = read_csv_gz_from_zip(mimic_zip, root_dir, "D_ITEMS.csv.gz")
-        d_labitems = read_csv_gz_from_zip(mimic_zip, root_dir, "D_LABITEMS.csv.gz")
+        with zipfile.ZipFile(mimic_zip, 'r') as zip_ref:
+            # Load key tables
+            admissions = read_csv_gz_from_zip(zip_ref, root_dir, "ADMISSIONS.csv.gz")
+            patients = read_csv_gz_from_zip(zip_ref, root_dir, "PATIENTS.csv.gz")
+            icustays = read_csv_gz_from_zip(zip_ref, root_dir, "ICUSTAYS.csv.gz")
+            
+            # Create random subset
+            print(f"\nSelecting {sample_size} random hospital admissions...")
+            all_hadm_ids = admissions['HADM_ID'].unique()
+            # Seeded for reproducibility; shuffle=False skips permuting the drawn sample
+            rng = np.random.default_rng(42)
+            sampled_hadm_ids = rng.choice(all_hadm_ids, size=sample_size, replace=False, shuffle=False).astype(np.int32)
+            
+            hadm_set = pa.array(sampled_hadm_ids)
+            
+            # Filter main tables
+            admissions_subset = filter_by_ids(admissions, 'HADM_ID', hadm_set)
+            sampled_subject_ids = admissions_subset['SUBJECT_ID'].unique().astype(np.int32)
+            patients_subset = filter_by_ids(patients, 'SUBJECT_ID', pa.array(sampled_subject_ids))
+            icustays_subset = filter_by_ids(icustays, 'HADM_ID', hadm_set)
+            
+            # Get ICU stay IDs
+            sampled_icustay_ids = icustays_subset['ICUSTAY_ID'].unique().astype(np.int32)
+            
+            # Load and filter other tables
+            print("\nExtracting related data...")
+            diagnoses = read_csv_gz_from_zip(zip_ref, root_dir, "DIAGNOSES_ICD.csv.gz")
+            diagnoses_subset = filter_by_ids(diagnoses, 'HADM_ID', hadm_set)
+            
+            procedures = read_csv_gz_from_zip(zip_ref, root_dir, "PROCEDURES_ICD.csv.gz")
+            procedures_subset = filter_by_ids(procedures, 'HADM_ID', hadm_set)
+            
+            prescriptions = read_csv_gz_from_zip(zip_ref, root_dir, "PRESCRIPTIONS.csv.gz")
+            prescriptions_subset = filter_by_ids(prescriptions, 'HADM_ID', hadm_set)
+            
+            # Copy dictionary tables unchanged; they are not filtered
+            dictionary_shapes = {}
+            for file_name in [
+                "D_ICD_DIAGNOSES.csv.gz",
+                "D_ICD_PROCEDURES.csv.gz",
+                "D_ITEMS.csv.gz",
+                "D_LABITEMS.csv.gz",
+            ]:
+                copy_gz_from_zip(zip_ref, root_dir, file_name, subset_dir)
+                dictionary_shapes[file_name] = csv_gz_shape(zip_ref, root_dir, file_name)
         
         # Define vital sign ITEMIDs
         vital_sign_itemids = [
@@ -236,38 +478,52 @@ def create_subset(mimic_zip, subset_dir, root_dir, sample_size=3000):
             615, 618, 220210, 224690  # Respiratory rate
         ]
         
-        # Extract vital signs from CHARTEVENTS
-        chartevents_subset = process_chartevents_chunks(
-            mimic_zip,
-            root_dir,
-            sampled_icustay_ids,
-            vital_sign_itemids
-        )
-        
-        # Extract lab events
-        labevents_subset = process_labevents_chunks(
-            mimic_zip,
-            root_dir,
-            sampled_subject_ids,
-            max_per_subject=20
-        )
+        # CHARTEVENTS and LABEVENTS are independent, so decompress them in parallel
+        # processes; each writes its own output and only returns the table shape
+        # Split the cores between the two workers for parallel decompression
+        parallelization = max(1, (os.cpu_count() or 1) // 2)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            # Extract vital signs from CHARTEVENTS
+            chartevents_future = executor.submit(
+                run_with_zip,
+                process_chartevents_chunks,
+                mimic_zip,
+                root_dir,
+                sampled_icustay_ids,
+                vital_sign_itemids,
+                os.path.join(subset_dir, "CHARTEVENTS_VITALS.parquet"),
+                decompressor=decompressor,
+                parallelization=parallelization,
+                position=0
+            )
+            
+            # Extract lab events
+            labevents_future = executor.submit(
+                run_with_zip,
+                process_labevents_chunks,
+                mimic_zip,
+                root_dir,
+                sampled_subject_ids,
+                os.path.join(subset_dir, "LABEVENTS_SAMPLE.parquet"),
+                max_per_subject=20,
+                decompressor=decompressor,
+                parallelization=parallelization,
+                position=1
+            )
+            
+            chartevents_shape = chartevents_future.result()
+            labevents_shape = labevents_future.result()
         
         # Save all subset DataFrames
         print("\nSaving subset files...")
-        save_df_to_csv(admissions_subset, subset_dir, "ADMISSIONS.csv")
-        save_df_to_csv(patients_subset, subset_dir, "PATIENTS.csv")
-        save_df_to_csv(icustays_subset, subset_dir, "ICUSTAYS.csv")
-        save_df_to_csv(diagnoses_subset, subset_dir, "DIAGNOSES_ICD.csv")
-        save_df_to_csv(procedures_subset, subset_dir, "PROCEDURES_ICD.csv")
-        save_df_to_csv(prescriptions_subset, subset_dir, "PRESCRIPTIONS.csv")
-        save_df_to_csv(chartevents_subset, subset_dir, "CHARTEVENTS_VITALS.csv")
-        save_df_to_csv(labevents_subset, subset_dir, "LABEVENTS_SAMPLE.csv")
-        
-        # Save dictionary tables
-        save_df_to_csv(d_icd_diagnoses, subset_dir, "D_ICD_DIAGNOSES.csv")
-        save_df_to_csv(d_icd_procedures, subset_dir, "D_ICD_PROCEDURES.csv")
-        save_df_to_csv(d_items, subset_dir, "D_ITEMS.csv")
-        save_df_to_csv(d_labitems, subset_dir, "D_LABITEMS.csv")
+        save_dfs_to_parquet([
+            (admissions_subset, "ADMISSIONS.parquet"),
+            (patients_subset, "PATIENTS.parquet"),
+            (icustays_subset, "ICUSTAYS.parquet"),
+            (diagnoses_subset, "DIAGNOSES_ICD.parquet"),
+            (procedures_subset, "PROCEDURES_ICD.parquet"),
+            (prescriptions_subset, "PRESCRIPTIONS.parquet"),
+        ], subset_dir)
         
         # Create README
         readme_content = f"""# MIMIC-III Subset
@@ -282,21 +538,21 @@ This directory contains a subset of the MIMIC-III database created for education
 
 ## Contents
 
-1. **ADMISSIONS.csv**: {admissions_subset.shape[0]} rows, {admissions_subset.shape[1]} columns
-2. **PATIENTS.csv**: {patients_subset.shape[0]} rows, {patients_subset.shape[1]} columns
-3. **ICUSTAYS.csv**: {icustays_subset.shape[0]} rows, {icustays_subset.shape[1]} columns
-4. **DIAGNOSES_ICD.csv**: {diagnoses_subset.shape[0]} rows, {diagnoses_subset.shape[1]} columns
-5. **PROCEDURES_ICD.csv**: {procedures_subset.shape[0]} rows, {procedures_subset.shape[1]} columns
-6. **PRESCRIPTIONS.csv**: {prescriptions_subset.shape[0]} rows, {prescriptions_subset.shape[1]} columns
-7. **CHARTEVENTS_VITALS.csv**: {chartevents_subset.shape[0]} rows, {chartevents_subset.shape[1]} columns
-8. **LABEVENTS_SAMPLE.csv**: {labevents_subset.shape[0]} rows, {labevents_subset.shape[1]} columns
+1. **ADMISSIONS.parquet**: {admissions_subset.shape[0]} rows, {admissions_subset.shape[1]} columns
+2. **PATIENTS.parquet**: {patients_subset.shape[0]} rows, {patients_subset.shape[1]} columns
+3. **ICUSTAYS.parquet**: {icustays_subset.shape[0]} rows, {icustays_subset.shape[1]} columns
+4. **DIAGNOSES_ICD.parquet**: {diagnoses_subset.shape[0]} rows, {diagnoses_subset.shape[1]} columns
+5. **PROCEDURES_ICD.parquet**: {procedures_subset.shape[0]} rows, {procedures_subset.shape[1]} columns
+6. **PRESCRIPTIONS.parquet**: {prescriptions_subset.shape[0]} rows, {prescriptions_subset.shape[1]} columns
+7. **CHARTEVENTS_VITALS.parquet**: {chartevents_shape[0]} rows, {chartevents_shape[1]} columns
+8. **LABEVENTS_SAMPLE.parquet**: {labevents_shape[0]} rows, {labevents_shape[1]} columns
 
 ## Dictionary Tables
 
-1. **D_ICD_DIAGNOSES.csv**: {d_icd_diagnoses.shape[0]} rows, {d_icd_diagnoses.shape[1]} columns
-2. **D_ICD_PROCEDURES.csv**: {d_icd_procedures.shape[0]} rows, {d_icd_procedures.shape[1]} columns
-3. **D_ITEMS.csv**: {d_items.shape[0]} rows, {d_items.shape[1]} columns
-4. **D_LABITEMS.csv**: {d_labitems.shape[0]} rows, {d_labitems.shape[1]} columns
+1. **D_ICD_DIAGNOSES.csv.gz**: {dictionary_shapes["D_ICD_DIAGNOSES.csv.gz"][0]} rows, {dictionary_shapes["D_ICD_DIAGNOSES.csv.gz"][1]} columns
+2. **D_ICD_PROCEDURES.csv.gz**: {dictionary_shapes["D_ICD_PROCEDURES.csv.gz"][0]} rows, {dictionary_shapes["D_ICD_PROCEDURES.csv.gz"][1]} columns
+3. **D_ITEMS.csv.gz**: {dictionary_shapes["D_ITEMS.csv.gz"][0]} rows, {dictionary_shapes["D_ITEMS.csv.gz"][1]} columns
+4. **D_LABITEMS.csv.gz**: {dictionary_shapes["D_LABITEMS.csv.gz"][0]} rows, {dictionary_shapes["D_LABITEMS.csv.gz"][1]} columns
 
 ## Statistics
 
@@ -307,7 +563,9 @@ This directory contains a subset of the MIMIC-III database created for education
 ## Notes
 
 - This subset maintains the same structure and relationships as the original MIMIC-III database
-- CHARTEVENTS has been filtered to include only vital signs
+- Core tables are saved as zstd-compressed Parquet files; load one with `pd.read_parquet(path)`
+- Dictionary tables are copied unchanged from the original database as gzipped CSV files
+- CHARTEVENTS has been filtered to include only vital signs, keeping the ID, time and value columns
 - LABEVENTS includes up to 20 lab tests per patient
 """
         